@@ -24,16 +24,14 @@
 # SOFTWARE.
 #
 require 'etc'
-require 'optparse'
 require_relative 'parser'
 
+# Characters that make Dir.glob treat a pattern as non-literal
+GLOB_METACHARACTERS = '*?[{\\'
+
 def keys(file, path, default = [])
   obj = walk(file, path, nil)
-  if obj.instance_of?(Array)
-    obj.keys
-  else
-    obj ? obj.keys : default
-  end
+  obj ? obj.keys : default
 end
 
 def get_requirement(cwl, req, default = nil)
@@ -875,7 +873,16 @@ def list_(cwl, output, runtime, inputs)
                  pats = g.evaluate(use_js, inputs, runtime, nil)
                  pats = pats.instance_of?(Array) ? pats : [pats]
                  pats.map{ |p|
-                   Dir.glob(p, base: dir).map{ |f|
+                   matched = if p.count(GLOB_METACHARACTERS).zero? and
+                               not p.start_with?('~')
+                               # no textual normalization: 'file/' and
+                               # 'missing/../file' must not match
+                               path = p.start_with?('/') ? p : File.join(dir, p)
+                               (File.exist?(path) or File.symlink?(path)) ? [p] : []
+                             else
+                               Dir.glob(p, base: dir)
+                             end
+                   matched.map{ |f|
                      path = File.expand_path(f, dir)
                      if File.directory? path
                        Directory.load({
@@ -998,18 +1005,19 @@ def listSecondaryFiles(file, sec, inputs, runtime, use_js)
 end
 
 def cwl_merge_requirements(cwl, reqs)
-  cwl.requirements = merge_requirements(reqs.fetch('cwl:requirements', []),
+  ret = cwl.dup
+  ret.requirements = merge_requirements(reqs.fetch('cwl:requirements', []),
                                         cwl.requirements,
                                         reqs.fetch('cwl-inspector:weak-requirements', []))
-  cwl.hints = merge_requirements(reqs.fetch('cwl-inspector:hints', []),
+  ret.hints = merge_requirements(reqs.fetch('cwl-inspector:hints', []),
                                  cwl.hints,
                                  reqs.fetch('cwl-inspector:weak-hints', []))
                 .delete_if{ |h|
-                  cwl.requirements.any?{ |r|
+                  ret.requirements.any?{ |r|
                     r.instance_of? h.class
                   }
                 }
-  cwl
+  ret
 end
 
 def merge_requirements(*reqs)
@@ -1017,9 +1025,16 @@ def merge_requirements(*reqs)
 end
 
 if $0 == __FILE__
+  require 'optparse'
+  begin
+    require 'oj'
+  rescue LoadError
+    # fall back to the json library
+  end
+
   format = :yaml
   inp_obj = nil
-  outdir = File.absolute_path Dir.pwd
+  outdir = nil
   tmpdir = '/tmp'
   do_preprocess = true
   do_eval = false
@@ -1058,16 +1073,26 @@ if $0 == __FILE__
     puts opt.help
     exit
   end
+  outdir ||= Dir.pwd
 
   file, cmd = ARGV
   unless File.exist?(file) or file == '-'
     raise CWLInspectionError, "No such file: #{file}"
   end
 
+  # write the result directly to STDOUT instead of building a string first
   fmt = if format == :yaml
-          ->(a) { YAML.dump(a) }
+          ->(a) { YAML.dump(a, STDOUT) }
+        elsif defined? Oj
+          ->(a) {
+            Oj.to_stream(STDOUT, a, mode: :compat)
+            STDOUT.puts
+          }
         else
-          ->(a) { JSON.dump(a) }
+          ->(a) {
+            JSON.dump(a, STDOUT)
+            STDOUT.puts
+          }
         end
 
   if inp_obj.nil? and do_eval
@@ -1075,7 +1100,13 @@ if $0 == __FILE__
   end
 
   cwl_ = if file == '-'
-          CommonWorkflowLanguage.load(YAML.load_stream(STDIN).first, Dir.pwd, {}, {})
+          # YAML.parse stops at the first document and, unlike YAML.load,
+          # does not restrict aliases or classes
+          doc = YAML.parse(STDIN)
+          unless doc
+            raise CWLInspectionError, 'No YAML document in stdin'
+          end
+          CommonWorkflowLanguage.load(doc.to_ruby, Dir.pwd, {}, {})
         else
           CommonWorkflowLanguage.load_file(file, do_preprocess)
         end
@@ -1085,41 +1116,54 @@ if $0 == __FILE__
 
   runtime = eval_runtime(cwl, inputs, outdir, tmpdir, docdir)
 
-  ret = case cmd
-        when /^\..*/
-          ret = walk(cwl, cmd)
-          if do_eval
-            ret = ret.evaluate(get_requirement(cwl, 'InlineJavascriptRequirement', false),
-                               inputs, runtime)
-          end
-          fmt.call ret.to_h
-        when /^keys\((\..*)\)$/
-          fmt.call keys(cwl, $1)
-        when 'commandline'
-          case walk(cwl, '.class')
-          when 'CommandLineTool'
-            if runtime['cores'].nil?
-              raise 'Specified minimum CPU cores is larger than the number of CPU cores'
-            elsif runtime['ram'].nil?
-              raise 'Specified minimum memory size is larger than the installed memory size'
-            end
-            commandline(cwl, runtime, inputs)
-          when 'ExpressionTool'
-            obj = cwl.expression.evaluate(get_requirement(cwl, 'InlineJavascriptRequirement', false),
-                                          inputs, runtime).to_h
-            "echo '#{JSON.dump(obj).gsub("'"){ "\\'" }}' > #{File.join(runtime['outdir'], 'cwl.output.json')}"
-          else
-            raise CWLInspectionError, "`commandline` does not support #{walk(cwl, '.class')} class"
-          end
-        when 'list'
-          case walk(cwl, '.class')
-          when 'CommandLineTool', 'ExpressionTool'
-            fmt.call list(cwl, runtime, inputs)
-          else
-            raise CWLInspectionError, "`list` does not support #{walk(cwl, '.class')} class"
-          end
-        else
-          raise CWLInspectionError, "Unsupported command: #{cmd}"
+  unsupported = ->(cmd) {
+    raise CWLInspectionError, "Unsupported command: #{cmd}"
+  }
+
+  # dispatched by the first character of the command
+  commands = {
+    '.' => ->(cmd) {
+      ret = walk(cwl, cmd)
+      if do_eval
+        ret = ret.evaluate(get_requirement(cwl, 'InlineJavascriptRequirement', false),
+                           inputs, runtime)
+      end
+      fmt.call ret.to_h
+    },
+    'k' => ->(cmd) {
+      unless cmd.start_with?('keys(.') and cmd.end_with?(')')
+        unsupported.call cmd
+      end
+      fmt.call keys(cwl, cmd[5...-1])
+    },
+    'c' => ->(cmd) {
+      unsupported.call cmd unless cmd == 'commandline'
+      case walk(cwl, '.class')
+      when 'CommandLineTool'
+        if runtime['cores'].nil?
+          raise 'Specified minimum CPU cores is larger than the number of CPU cores'
+        elsif runtime['ram'].nil?
+          raise 'Specified minimum memory size is larger than the installed memory size'
         end
-  puts ret
+        puts commandline(cwl, runtime, inputs)
+      when 'ExpressionTool'
+        obj = cwl.expression.evaluate(get_requirement(cwl, 'InlineJavascriptRequirement', false),
+                                      inputs, runtime).to_h
+        puts "echo '#{JSON.dump(obj).gsub("'"){ "\\'" }}' > #{File.join(runtime['outdir'], 'cwl.output.json')}"
+      else
+        raise CWLInspectionError, "`commandline` does not support #{walk(cwl, '.class')} class"
+      end
+    },
+    'l' => ->(cmd) {
+      unsupported.call cmd unless cmd == 'list'
+      case walk(cwl, '.class')
+      when 'CommandLineTool', 'ExpressionTool'
+        fmt.call list(cwl, runtime, inputs)
+      else
+        raise CWLInspectionError, "`list` does not support #{walk(cwl, '.class')} class"
+      end
+    },
+  }
+
+  commands.fetch(cmd[0], unsupported).call(cmd)
 end
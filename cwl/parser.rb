@@ -25,13 +25,8 @@
 #
 require 'yaml'
 require 'json'
-require 'fileutils'
-require 'optparse'
 require 'open-uri'
 require 'securerandom'
-require 'tmpdir'
-require 'tempfile'
-require 'digest/sha1'
 require_relative 'schema-salad'
 
 class CWLParseError < StandardError
@@ -43,31 +38,60 @@ end
 class UnsupportedError < StandardError
 end
 
+WALK_PATH_DELIMITER = /\.|\[|\]\.|\]/
+
+# document key -> field name, for keys that are not valid Ruby identifiers
+FIELD_ALIASES = {
+  'class' => 'class_',
+  '$mixin' => 'mixin',
+  '$namespaces' => 'namespaces',
+  '$schemas' => 'schemas',
+}.freeze
+FIELD_KEYS = FIELD_ALIASES.invert.freeze
+
 def walk(cwl, path, default = nil, exception = false)
   unless path.start_with? '.'
     raise CWLInspectionError, "Invalid path: #{path}"
   end
   if cwl.instance_of? String
-    cwl = CommonWorkflowLanguage.load_file(cwl)
+    cwl = CommonWorkflowLanguage.load_file_cached(cwl)
+  end
+  msg = catch(:no_such_field) do
+    # the leading '.' yields an empty first segment
+    segments = path.split(WALK_PATH_DELIMITER)
+    segments.shift
+    return cwl.walk_(segments)
+  end
+  if exception
+    raise CWLInspectionError, msg
   end
+  default
+end
 
-  begin
-    cwl.walk(path[1..-1].split(/\.|\[|\]\.|\]/))
-  rescue CWLInspectionError => e
-    if exception
-      raise e
-    else
-      default
-    end
+# `#walk_` methods are the internal walkers: they throw `:no_such_field`
+# with a message instead of raising so that lookups with a default value
+# do not pay for exceptions. Use `walk`, `walk!` or `#walk` instead.
+def walk!(obj, path)
+  msg = catch(:no_such_field) do
+    return obj.walk_(path)
   end
+  raise CWLInspectionError, msg
 end
 
-class NilClass
+module Walkable
   def walk(path)
+    walk!(self, path)
+  end
+end
+
+class NilClass
+  include Walkable
+
+  def walk_(path)
     if path.empty?
       self
     else
-      raise CWLInspectionError, "No such field for #{self}: #{path}"
+      throw :no_such_field, "No such field for #{self}: #{path}"
     end
   end
 
@@ -77,11 +101,13 @@ class NilClass
 end
 
 class Integer
-  def walk(path)
+  include Walkable
+
+  def walk_(path)
     if path.empty?
       self
     else
-      raise CWLInspectionError, "No such field for #{self}: #{path}"
+      throw :no_such_field, "No such field for #{self}: #{path}"
     end
   end
 
@@ -91,11 +117,13 @@ class Integer
 end
 
 class Float
-  def walk(path)
+  include Walkable
+
+  def walk_(path)
     if path.empty?
       self
     else
-      raise CWLInspectionError, "No such field for #{self}: #{path}"
+      throw :no_such_field, "No such field for #{self}: #{path}"
     end
   end
 
@@ -105,11 +133,13 @@ class Float
 end
 
 class String
-  def walk(path)
+  include Walkable
+
+  def walk_(path)
     if path.empty?
       self
     else
-      raise CWLInspectionError, "No such field for #{self}: #{path}"
+      throw :no_such_field, "No such field for #{self}: #{path}"
     end
   end
 
@@ -119,11 +149,13 @@ class String
 end
 
 class TrueClass
-  def walk(path)
+  include Walkable
+
+  def walk_(path)
     if path.empty?
       self
     else
-      raise CWLInspectionError, "No such field for #{self}: #{path}"
+      throw :no_such_field, "No such field for #{self}: #{path}"
     end
   end
 
@@ -133,11 +165,13 @@ class TrueClass
 end
 
 class FalseClass
-  def walk(path)
+  include Walkable
+
+  def walk_(path)
     if path.empty?
       self
     else
-      raise CWLInspectionError, "No such field for #{self}: #{path}"
+      throw :no_such_field, "No such field for #{self}: #{path}"
     end
   end
 
@@ -147,11 +181,13 @@ class FalseClass
 end
 
 class Symbol
-  def walk(path)
+  include Walkable
+
+  def walk_(path)
     if path.empty?
       self
     else
-      raise CWLInspectionError, "No such field for #{self}: #{path}"
+      throw :no_such_field, "No such field for #{self}: #{path}"
     end
   end
 
@@ -161,35 +197,37 @@ class Symbol
 end
 
 class Array
-  def walk(path)
+  include Walkable
+
+  def walk_(path)
     if path.empty?
       return self
     end
     idx = path.shift
-    if idx.match?(/^\d+$/)
+    if not idx.empty? and idx.count('0-9') == idx.length
       i = idx.to_i
       if i >= self.length
-        raise CWLInspectionError, "Invalid index for #{self.first.class}[]: #{i}"
+        throw :no_such_field, "Invalid index for #{self.first.class}[]: #{i}"
       end
-      self[idx.to_i].walk(path)
+      self[idx.to_i].walk_(path)
     else
       fst = self.first
-      field = if fst.instance_variable_defined? '@id'
-                '@id'
-              elsif fst.instance_variable_defined? '@class_'
-                '@class_'
-              elsif fst.instance_variable_defined? '@package'
-                '@package'
+      field = if fst.instance_variable_defined? :@id
+                :@id
+              elsif fst.instance_variable_defined? :@class_
+                :@class_
+              elsif fst.instance_variable_defined? :@package
+                :@package
               else
-                raise CWLInspectionError, "No such field: #{idx}"
+                throw :no_such_field, "No such field: #{idx}"
               end
       i = self.index{ |e|
         e.instance_variable_get(field) == idx
       }
       if i.nil?
-        raise CWLInspectionError, "No such field: #{idx}"
+        throw :no_such_field, "No such field: #{idx}"
       end
-      self[i].walk(path)
+      self[i].walk_(path)
     end
   end
 
@@ -198,12 +236,12 @@ class Array
       self
     else
       fst = self.first
-      field = if fst.instance_variable_defined? '@id'
-                '@id'
-              elsif fst.instance_variable_defined? '@class_'
-                '@class_'
-              elsif fst.instance_variable_defined? '@package'
-                '@package'
+      field = if fst.instance_variable_defined? :@id
+                :@id
+              elsif fst.instance_variable_defined? :@class_
+                :@class_
+              elsif fst.instance_variable_defined? :@package
+                :@package
               else
                 raise CWLInspectionError, "Invalid operation `keys` for #{self.first.class}[]"
               end
@@ -244,8 +282,45 @@ end
 
 class CommonWorkflowLanguage
   def self.load_file(file, do_preprocess = true)
+    load_file_(file, do_preprocess)
+  end
+
+  # absolute file => [[[path, mtime, size], ...], loaded object]
+  @loaded = {}
+
+  # Internal: returns a document shared between callers, so the result
+  # must not be modified. It is reloaded when the file or any file it
+  # imports or includes changes.
+  def self.load_file_cached(file)
+    key = File.expand_path(file)
+    cached_stamps, cached = @loaded[key]
+    if cached_stamps and cached_stamps == file_stamps(cached_stamps.map{ |st| st.first })
+      return cached
+    end
+    deps = []
+    ret = load_file_(file, true, deps)
+    stamps = file_stamps([File.expand_path(file.sub(/#.*/, '')), *deps])
+    if stamps.nil?
+      @loaded.delete(key)
+    else
+      @loaded[key] = [stamps, ret]
+    end
+    ret
+  end
+
+  def self.file_stamps(paths)
+    paths.map{ |path|
+      unless File.file? path
+        return nil
+      end
+      st = File.stat(path)
+      [path, st.mtime, st.size]
+    }
+  end
+
+  def self.load_file_(file, do_preprocess, deps = nil)
     obj = if do_preprocess
-            preprocess(file)
+            preprocess(file, deps)
           else
             URI.open(file.sub(/#.*/, '')) { |f|
               YAML.load(f)
@@ -284,6 +359,8 @@ class CommonWorkflowLanguage
 end
 
 class CWLObject
+  include Walkable
+
   attr_accessor :extras
 
   def self.inherited(subclass)
@@ -301,16 +378,9 @@ class CWLObject
         }
 
         fields.all?{ |k|
-          class_variable_get(:@@fields).map{ |m|
-            case m
-            when :class_ then :class
-            when :mixin then '$mixin'
-            when :namespaces then '$namespaces'
-            when :schemas then '$schemas'
-            else m
-            end
-          }.any?{ |f|
-            f.to_s == k
+          class_variable_get(:@@fields).any?{ |m|
+            f = m.to_s
+            FIELD_KEYS.fetch(f, f) == k
           } or k.start_with?('$')
         } and satisfies_additional_constraints(obj)
       end
@@ -326,16 +396,16 @@ class CWLObject
     true
   end
 
-  def walk(path)
+  def walk_(path)
     if path.empty?
       return self
     end
     field = path.shift
-    f = field == 'class' ? '@class_' : "@#{field}"
+    f = "@#{FIELD_ALIASES.fetch(field, field)}"
     unless instance_variable_defined? f
-      raise CWLInspectionError, "No such field for #{self.class}: #{field}"
+      throw :no_such_field, "No such field for #{self.class}: #{field}"
     end
-    instance_variable_get(f).walk(path)
+    instance_variable_get(f).walk_(path)
   end
 
   def evaluate(js_req, inputs, runtime, self_ = nil)
@@ -732,6 +802,8 @@ class CommandLineBinding < CWLObject
 end
 
 class CWLType
+  include Walkable
+
   attr_reader :type
 
   def self.load(obj, dir, frags, nss)
@@ -742,7 +814,7 @@ class CWLType
     @type = obj
   end
 
-  def walk(path)
+  def walk_(path)
     if path.empty?
       @type
     else
@@ -1006,6 +1078,7 @@ class CWLFile < CWLObject
       file.format = @format
       if File.exist? file.path
         if compute_checksum
+          require 'digest/sha1'
           sha1 = Digest::SHA1.new
           sha1.file(file.path)
           digest = sha1.hexdigest
@@ -1185,8 +1258,8 @@ class CommandInputUnionSchema < CWLObject
     }
   end
 
-  def walk(path)
-    @types.walk(path)
+  def walk_(path)
+    @types.walk_(path)
   end
 
   def evaluate(js_req, inputs, runtime, self_ = nil)
@@ -1493,11 +1566,13 @@ class CommandOutputParameter < CWLObject
 end
 
 class Stdout
+  include Walkable
+
   def self.load(obj, dir, frags, nss)
     self.new
   end
 
-  def walk(path)
+  def walk_(path)
     if path.empty?
       'stdout'
     else
@@ -1515,11 +1590,13 @@ class Stdout
 end
 
 class Stderr
+  include Walkable
+
   def self.load(obj, dir, frags, nss)
     self.new
   end
 
-  def walk(path)
+  def walk_(path)
     if path.empty?
       'stderr'
     else
@@ -1601,8 +1678,8 @@ class CommandOutputUnionSchema < CWLObject
     }
   end
 
-  def walk(path)
-    @types.walk(path)
+  def walk_(path)
+    @types.walk_(path)
   end
 
   def evaluate(js_req, inputs, runtime, self_ = nil)
@@ -1933,8 +2010,8 @@ class InputUnionSchema < CWLObject
     }
   end
 
-  def walk(path)
-    @types.walk(path)
+  def walk_(path)
+    @types.walk_(path)
   end
 
   def evaluate(js_req, inputs, runtime, self_ = nil)
@@ -2742,7 +2819,7 @@ def evaluate_parameter_reference(exp, inputs, runtime, self_)
       unless inputs.include? attr
         raise CWLInspectionError, "Invalid parameter: inputs.#{attr}"
       end
-      inputs[attr].walk(path[2..-1])
+      walk!(inputs[attr], path[2..-1])
     end
   when 'self'
     if self_.nil?
@@ -2751,7 +2828,7 @@ def evaluate_parameter_reference(exp, inputs, runtime, self_)
     if path[1..-1].empty?
       self_
     else
-      self_.walk(path[1..-1])
+      walk!(self_, path[1..-1])
     end
   when 'runtime'
     attr = path[1]
@@ -2886,6 +2963,8 @@ def parse_js_expression(str)
 end
 
 class Expression
+  include Walkable
+
   attr_reader :expression
 
   def self.load(obj, dir, frags, nss)
@@ -2896,11 +2975,11 @@ class Expression
     @expression = exp
   end
 
-  def walk(path)
+  def walk_(path)
     if path.empty?
       self
     else
-      raise CWLInspectionError, "No such field for #{self}: #{path}"
+      throw :no_such_field, "No such field for #{self}: #{path}"
     end
   end
 
@@ -4321,6 +4400,8 @@ class InputParameter
 end
 
 class CWLUnionValue
+  include Walkable
+
   attr_accessor :type, :value
 
   def initialize(type, value)
@@ -4332,11 +4413,11 @@ class CWLUnionValue
     end
   end
 
-  def walk(path)
+  def walk_(path)
     if path.empty?
       self
     else
-      @value.walk(path[1..-1])
+      @value.walk_(path[1..-1])
     end
   end
 
@@ -4346,21 +4427,23 @@ class CWLUnionValue
 end
 
 class CWLRecordValue
+  include Walkable
+
   attr_accessor :fields
 
   def initialize(fields)
     @fields = fields
   end
 
-  def walk(path)
+  def walk_(path)
     if path.empty?
       self
     else
       f = path.first
       unless @fields.include? f
-        raise CWLInspectionError, "No such field: #{f}"
+        throw :no_such_field, "No such field: #{f}"
       end
-      @fields[f].walk(path[1..-1])
+      @fields[f].walk_(path[1..-1])
     end
   end
 
@@ -4459,6 +4542,8 @@ class InvalidValue
 end
 
 if $0 == __FILE__
+  require 'optparse'
+
   format = :yaml
   opt = OptionParser.new
   opt.banner = "Usage: #{$0} [options] cwl"
@@ -26,9 +26,9 @@
 require 'json'
 require 'yaml'
 require 'open-uri'
-require 'optparse'
 
-def preprocess(file)
+# `deps`, if given, collects the locations of imported and included files
+def preprocess(file, deps = nil)
   file = if file.match(/^(.+?)#.+$/)
            $1
          else
@@ -43,30 +43,30 @@ def preprocess(file)
             else
               File.dirname(File.expand_path(file))
             end
-  traverse(obj, basedir)
+  traverse(obj, basedir, deps)
 end
 
-def traverse(obj, basedir)
+def traverse(obj, basedir, deps = nil)
   case obj
   when Array
     obj.map{ |o|
-      traverse(o, basedir)
+      traverse(o, basedir, deps)
     }
   when Hash
     if obj.include? '$import'
-      import_resource(obj['$import'], basedir)
+      import_resource(obj['$import'], basedir, deps)
     elsif obj.include? '$include'
-      include_resource(obj['$include'], basedir)
+      include_resource(obj['$include'], basedir, deps)
     elsif obj.include? '$mixin'
       removed = obj.dup
       mixin = removed.delete('$mixin')
-      o = import_resource(mixin, basedir)
+      o = import_resource(mixin, basedir, deps)
       o.merge(removed.transform_values{ |v|
-                traverse(v, basedir)
+                traverse(v, basedir, deps)
               })
     else
       obj.transform_values{ |v|
-        traverse(v, basedir)
+        traverse(v, basedir, deps)
       }
     end
   else
@@ -74,7 +74,8 @@ def traverse(obj, basedir)
   end
 end
 
-def import_resource(uri, basedir)
+def import_resource(uri, basedir, deps = nil)
+  deps.push(resource_location(uri, basedir)) unless deps.nil?
   obj = case uri
         when %r|^https?://|
           YAML.load(URI.open(uri, open_timeout: 2))
@@ -85,10 +86,11 @@ def import_resource(uri, basedir)
         else
           YAML.load_file(File.expand_path(uri, basedir))
         end
-  traverse(obj, basedir)
+  traverse(obj, basedir, deps)
 end
 
-def include_resource(uri, basedir)
+def include_resource(uri, basedir, deps = nil)
+  deps.push(resource_location(uri, basedir)) unless deps.nil?
   case uri
   when %r|^https?://|
     URI.open(uri, open_timeout: 2).read
@@ -101,6 +103,17 @@ def include_resource(uri, basedir)
   end
 end
 
+def resource_location(uri, basedir)
+  case uri
+  when %r|^https?://|, %r|^/|
+    uri
+  when %r|^file://(.+)$|
+    $1
+  else
+    File.expand_path(uri, basedir)
+  end
+end
+
 def fragments(obj)
   obj = preprocess(obj) if obj.instance_of? String
   collect_fragments(obj)
@@ -140,6 +153,8 @@ def namespaces(obj)
 end
 
 if $0 == __FILE__
+  require 'optparse'
+
   return_fragment = false
   opt = OptionParser.new
   opt.banner = "Usage: #{$0} cwl"
@@ -1,6 +1,8 @@
 #!/usr/bin/env ruby
 # coding: utf-8
 require 'yaml'
+require 'fileutils'
+require 'tmpdir'
 require 'test/unit'
 require_relative '../cwl/inspector'
 
@@ -31,10 +33,50 @@ class TestEcho < Test::Unit::TestCase
     assert_equal('v1.0', walk(@cwl, '.cwlVersion'))
   end
 
+  def test_class
+    assert_equal('CommandLineTool', walk(@cwl, '.class'))
+  end
+
   def test_id_based_access
     assert_equal('Input string', walk(@cwl, '.inputs.input.label'))
   end
 
+  def test_walk_after_modification
+    cwl = CommonWorkflowLanguage.load_file(@cwl)
+    assert_equal('output', walk(cwl, '.stdout').expression)
+    cwl.stdout = 'changed'
+    assert_equal('changed', walk(cwl, '.stdout'))
+  end
+
+  def test_walk_missing_field
+    assert_equal(:d, walk(@cwl, '.nope', :d))
+    assert_equal(:d, walk(@cwl, '.inputs.5', :d))
+    e = assert_raise(CWLInspectionError) {
+      walk(@cwl, '.nope', nil, true)
+    }
+    assert_equal('No such field for CommandLineTool: nope', e.message)
+    cwl = CommonWorkflowLanguage.load_file(@cwl)
+    e = assert_raise(CWLInspectionError) {
+      cwl.inputs.walk(['nope'])
+    }
+    assert_equal('No such field: nope', e.message)
+    assert_equal('Input string', cwl.walk(['inputs', 'input', 'label']))
+  end
+
+  def test_parameter_reference_to_missing_field
+    inputs = { 'input' => 'Hello!' }
+    e = assert_raise(CWLInspectionError) {
+      evaluate_parameter_reference('inputs.input.missing', inputs, @runtime, nil)
+    }
+    assert_equal('No such field for Hello!: ["missing"]', e.message)
+
+    exp = Expression.load('$(inputs.input.missing)', '.', {}, {})
+    e = assert_raise(CWLInspectionError) {
+      exp.evaluate(false, inputs, @runtime)
+    }
+    assert_equal('Invalid parameter reference: $(inputs.input.missing)', e.message)
+  end
+
   def test_index_based_access
     assert_equal('Input string', walk(@cwl, '.inputs.0.label'))
   end
@@ -80,4 +122,33 @@ class TestEcho < Test::Unit::TestCase
   def test_keys
     assert_equal(['input'], keys(@cwl, '.inputs'))
   end
+
+  def test_load_file_cache
+    Dir.mktmpdir{ |dir|
+      file = File.join(dir, 'echo.cwl')
+      label = File.join(dir, 'label.txt')
+      File.write(file, File.read(@cwl).sub('label: Input string',
+                                           'label: { $include: label.txt }'))
+      File.write(label, 'first')
+      cwl = CommonWorkflowLanguage.load_file(file)
+      assert_not_same(cwl, CommonWorkflowLanguage.load_file(file))
+      assert_equal('first', walk(file, '.inputs.input.label'))
+
+      File.write(label, 'second label')
+      assert_equal('second label', walk(file, '.inputs.input.label'))
+
+      File.write(file, File.read(file).sub('id: echo_cwl', 'id: echo_cwl_modified'))
+      assert_equal('echo_cwl_modified', walk(file, '.id'))
+    }
+  end
+
+  def test_merge_requirements
+    cwl = CommonWorkflowLanguage.load_file(@cwl)
+    req = Workflow.load_requirement({ 'class' => 'DockerRequirement', 'dockerPull' => 'alpine' },
+                                    Dir.pwd, [], {}, {})
+    merged = cwl_merge_requirements(cwl, { 'cwl:requirements' => [req] })
+    assert_equal('alpine', walk(merged, '.requirements.DockerRequirement.dockerPull'))
+    assert_nil(walk(merged, '.hints.DockerRequirement'))
+    assert_equal('docker/whalesay', walk(cwl, '.hints.DockerRequirement.dockerPull'))
+  end
 end
@@ -1,6 +1,8 @@
 #!/usr/bin/env ruby
 # coding: utf-8
 require 'yaml'
+require 'fileutils'
+require 'tmpdir'
 require 'test/unit'
 require_relative '../cwl/inspector'
 
@@ -56,4 +58,51 @@ class TestWorkflow < Test::Unit::TestCase
     cwl = CommonWorkflowLanguage.load_file(@cwlfile)
     assert_equal(['compile', 'untar'], keys(cwl, '.steps').sort)
   end
+
+  def test_list_literal_glob
+    cwlfile = File.join(@cwldir, 'tar-param.cwl')
+    cwl = CommonWorkflowLanguage.load_file(cwlfile)
+    Dir.mktmpdir{ |dir|
+      FileUtils.touch(File.join(dir, 'hello.txt'))
+      File.symlink(File.join(dir, 'nowhere'), File.join(dir, 'dangling.txt'))
+      runtime = @runtime.merge('outdir' => dir)
+      out = ->(extractfile) {
+        inputs, _ = parse_inputs(cwl,
+                                 {
+                                   'tarfile' => {
+                                     'class' => 'File',
+                                     'path' => 'Foo.java',
+                                   },
+                                   'extractfile' => extractfile,
+                                 },
+                                 @cwldir)
+        list(cwl, runtime, inputs)['example_out']
+      }
+      assert_equal(File.join(dir, 'hello.txt'), out.call('hello.txt')['path'])
+      assert_equal(File.join(dir, 'dangling.txt'), out.call('dangling.txt')['path'])
+      assert_nil(out.call('missing.txt'))
+      assert_nil(out.call('~'))
+      assert_nil(out.call('hello.txt/'))
+      assert_nil(out.call('nodir/../hello.txt'))
+      assert_equal(File.join(dir, 'hello.txt'), out.call(File.join(dir, 'hello.txt'))['path'])
+    }
+  end
+
+  def test_step_lookup_after_modification
+    steps = CommonWorkflowLanguage.load_file(@cwlfile).steps.map{ |s| s.dup }
+    assert_equal('untar', walk(steps, '.untar.id'))
+
+    steps.reverse!
+    assert_equal('untar', walk(steps, '.untar.id'))
+    assert_equal('compile', walk(steps, '.compile.id'))
+    assert_nil(walk(steps, '.nope'))
+
+    steps.first.id = 'renamed'
+    assert_equal('renamed', walk(steps, '.renamed.id'))
+    assert_nil(walk(steps, '.compile'))
+
+    steps.delete_if{ |s| s.id == 'untar' }
+    assert_nil(walk(steps, '.untar'))
+    assert_equal('renamed', walk(steps, '.renamed.id'))
+  end
 end